@@ -1,14 +1,120 @@
 // parallel_update.cpp
 // Usage:
 // cpp/bin/parallel_update graph.txt states.txt output_states.txt history.txt T [alpha] [threads]
+// threads may be a comma-separated list ("1,2,4,8") to sweep thread counts over one
+// loaded graph: outputs get a _t<k> suffix and "threads,time" CSV rows go to stdout.
+// Output paths ending in .npy are written as full-precision float64 .npy arrays.
+// cpp/bin/parallel_update --manifest cases.txt runs one case per line (same arguments).
+// graph may also be a binary graph.csr file (see py/build_graph.py --csr) and
+// states a states.bin file of raw float32 values (see py/build_graph.py --binary)
 #include <bits/stdc++.h>
 #include <omp.h>
 #include <iomanip>
 using namespace std;
 
-int main(int argc, char** argv) {
+// cpp/build.sh compiles with -ffp-contract=off so the update is not fused into an FMA and the
+// default build is bit-identical to py/serial_sim.py (the compiler's default contraction is not).
+// Build with -DPU_SIMD (SIMD=1 bash cpp/build.sh) to vectorize each node's neighbor sum.
+// The reduction reorders additions, so results are no longer bit-identical to the serial code.
+#ifdef PU_SIMD
+#define PU_NEIGHBOR_SIMD _Pragma("omp simd reduction(+:sum)")
+#else
+#define PU_NEIGHBOR_SIMD
+#endif
+
+// Thread count OpenMP picks on its own (OMP_NUM_THREADS, else all cores). omp_set_num_threads
+// is process-global, so it is captured before the first call and runs that ask for no
+// explicit count (threads <= 0) reset to it instead of inheriting the previous run's count.
+static int default_thread_count() {
+    static const int n = omp_get_max_threads();
+    return n;
+}
+
+// In-memory entry point for the shared library (SHARED=1 bash cpp/build.sh, loaded from
+// Python with ctypes, see py/parallel_lib.py). Same CSR layout and update as the binary:
+// indices[indptr[v]..indptr[v+1]) are v's sources. states holds N values on entry and the
+// final states on return; history receives the mean state after each of the T steps.
+extern "C" int pu_simulate(const int64_t* indptr, const int32_t* indices, int64_t N,
+                           double* states, double* history, int T, double alpha, int threads) {
+    if (N < 0 || T < 0) return 1;
+    omp_set_dynamic(0);
+    omp_set_num_threads(threads > 0 ? threads : default_thread_count());
+    vector<double> scratch(static_cast<size_t>(N));
+    double* cur = states;
+    double* next = scratch.data();
+    for (int t=0; t<T; ++t) {
+        double global_sum = 0.0;
+        #pragma omp parallel for reduction(+:global_sum) schedule(static)
+        for (int64_t v=0; v<N; ++v) {
+            int64_t start = indptr[v];
+            int64_t end = indptr[v+1];
+            if (start == end) {
+                next[v] = cur[v];
+            } else {
+                double sum = 0.0;
+                PU_NEIGHBOR_SIMD
+                for (int64_t j=start; j<end; ++j) sum += cur[indices[j]];
+                double avg = sum / double(end - start);
+                next[v] = (1.0 - alpha) * cur[v] + alpha * avg;
+            }
+            global_sum += next[v];
+        }
+        std::swap(cur, next);
+        history[t] = N > 0 ? global_sum / double(N) : 0.0;
+    }
+    if (cur != states) std::copy(cur, cur + N, states);
+    return 0;
+}
+
+#ifndef PU_SHARED_LIB
+static bool ends_with(const string& s, const string& suffix) {
+    return s.size() >= suffix.size() && s.compare(s.size() - suffix.size(), suffix.size(), suffix) == 0;
+}
+
+// Full-precision binary output: a 1-D little-endian float64 .npy (format 1.0) that
+// np.load can memory-map, instead of 6-significant-digit text
+static bool write_npy(const string& path, const vector<double>& v) {
+    string header = "{'descr': '<f8', 'fortran_order': False, 'shape': (" + to_string(v.size()) + ",), }";
+    // magic(6) + version(2) + header length(2) + header, padded to a multiple of 64 and ending in '\n'
+    size_t total = 10 + header.size() + 1;
+    header.append((64 - total % 64) % 64, ' ');
+    header.push_back('\n');
+    FILE* fp = fopen(path.c_str(), "wb");
+    if (!fp) return false;
+    const unsigned char preamble[8] = {0x93, 'N', 'U', 'M', 'P', 'Y', 1, 0};
+    const uint16_t hlen = static_cast<uint16_t>(header.size());
+    const unsigned char len_le[2] = {static_cast<unsigned char>(hlen & 0xff), static_cast<unsigned char>(hlen >> 8)};
+    bool ok = fwrite(preamble, 1, 8, fp) == 8 && fwrite(len_le, 1, 2, fp) == 2 &&
+              fwrite(header.data(), 1, header.size(), fp) == header.size() &&
+              fwrite(v.data(), sizeof(double), v.size(), fp) == v.size();
+    return fclose(fp) == 0 && ok;
+}
+
+// "dir/history.txt" -> "dir/history_t4.txt"
+static string with_thread_suffix(const string& path, int threads) {
+    size_t slash = path.find_last_of('/');
+    size_t dot = path.find_last_of('.');
+    if (dot == string::npos || (slash != string::npos && dot < slash)) dot = path.size();
+    return path.substr(0, dot) + "_t" + to_string(threads) + path.substr(dot);
+}
+
+// Restores a stream's format flags and precision on scope exit (the progress lines
+// switch cerr to fixed, which would otherwise leak into the next sweep or manifest case)
+class StreamFormatGuard {
+public:
+    explicit StreamFormatGuard(ostream& os) : os_(os), flags_(os.flags()), precision_(os.precision()) {}
+    ~StreamFormatGuard() { os_.flags(flags_); os_.precision(precision_); }
+private:
+    ostream& os_;
+    ios::fmtflags flags_;
+    streamsize precision_;
+};
+
+// One simulation; argv follows the command-line usage above
+static int run_case(int argc, char** argv) {
     if (argc < 6) {
-        cerr << "Usage: " << argv[0] << " graph.txt states.txt output_states.txt history.txt T [alpha] [threads]\n";
+        cerr << "Usage: " << argv[0] << " graph.txt states.txt output_states.txt history.txt T [alpha] [threads]\n"
+             << "       " << argv[0] << " --manifest cases.txt\n";
         return 1;
     }
     string graph_file = argv[1];
@@ -18,20 +124,59 @@ int main(int argc, char** argv) {
     int T = stoi(argv[5]);
     double alpha = 0.3;
     if (argc >= 7) alpha = stod(argv[6]);
-    int threads = 0;
-    if (argc >= 8) threads = stoi(argv[7]);
+    // threads may be a single count or a comma-separated sweep such as "1,2,4,8"
+    vector<int> thread_list;
+    if (argc >= 8) {
+        stringstream ts(argv[7]);
+        string tok;
+        while (getline(ts, tok, ',')) if (!tok.empty()) thread_list.push_back(stoi(tok));
+    }
+    if (thread_list.empty()) thread_list.push_back(0);
 
-    // disable OpenMP dynamic thread adjustment and set threads if requested
+    // disable OpenMP dynamic thread adjustment; thread counts are set per run below
     omp_set_dynamic(0);
-    if (threads > 0) omp_set_num_threads(threads);
 
-    // Read graph: skip empty lines and comments (#)
-    ifstream gf(graph_file);
-    if (!gf.is_open()) { cerr << "Cannot open graph file: " << graph_file << endl; return 2; }
-    long long N_ll = 0, M_ll = 0;
-    // read header robustly
-    {
-        string line;
+    size_t N = 0, M = 0;
+    vector<size_t> offsets;  // incoming-neighbor CSR: nbrs[offsets[v]..offsets[v+1]) are v's sources
+    vector<int> nbrs;
+    string line;
+    if (ends_with(graph_file, ".csr")) {
+        // Binary CSR written by build_graph.py --csr:
+        // int64 N, int64 M, int64 row_ptr[N+1] (by destination), int32 col[M] (sources)
+        FILE* gfp = fopen(graph_file.c_str(), "rb");
+        if (!gfp) { cerr << "Cannot open graph file: " << graph_file << endl; return 2; }
+        int64_t header[2] = {0, 0};
+        if (fread(header, sizeof(int64_t), 2, gfp) != 2 || header[0] <= 0 || header[1] < 0) {
+            cerr << "Invalid header in CSR graph file\n"; fclose(gfp); return 2;
+        }
+        N = static_cast<size_t>(header[0]);
+        M = static_cast<size_t>(header[1]);
+        vector<int64_t> row_ptr(N+1);
+        nbrs.resize(M);
+        bool ok = fread(row_ptr.data(), sizeof(int64_t), N+1, gfp) == N+1
+               && fread(nbrs.data(), sizeof(int32_t), M, gfp) == M;
+        fclose(gfp);
+        if (!ok || row_ptr[0] != 0 || static_cast<size_t>(row_ptr[N]) != M) {
+            cerr << "Truncated or inconsistent CSR graph file\n"; return 2;
+        }
+        // the update loop trusts these bounds; a corrupt file would otherwise read out of range
+        for (size_t v = 0; v < N; ++v) {
+            if (row_ptr[v] > row_ptr[v+1]) {
+                cerr << "CSR row_ptr decreases at node " << v << "\n"; return 2;
+            }
+        }
+        for (size_t k = 0; k < M; ++k) {
+            if (nbrs[k] < 0 || static_cast<size_t>(nbrs[k]) >= N) {
+                cerr << "CSR col[" << k << "] = " << nbrs[k] << " is outside [0, " << N << ")\n"; return 2;
+            }
+        }
+        offsets.assign(row_ptr.begin(), row_ptr.end());
+    } else {
+        // Read graph: skip empty lines and comments (#)
+        ifstream gf(graph_file);
+        if (!gf.is_open()) { cerr << "Cannot open graph file: " << graph_file << endl; return 2; }
+        long long N_ll = 0, M_ll = 0;
+        // read header robustly
         while (getline(gf, line)) {
             if (line.size()==0) continue;
             // skip comments
@@ -39,266 +184,333 @@ int main(int argc, char** argv) {
             stringstream ss(line);
             if (ss >> N_ll >> M_ll) break;
         }
-    }
-    if (N_ll <= 0) { cerr << "Invalid N in graph file\n"; return 2; }
-    const size_t N = static_cast<size_t>(N_ll);
-    const size_t M = static_cast<size_t>(M_ll);
+        if (N_ll <= 0) { cerr << "Invalid N in graph file\n"; return 2; }
+        N = static_cast<size_t>(N_ll);
+        M = static_cast<size_t>(M_ll);
 
-    vector<pair<int,int>> edges;
-    edges.reserve(M);
-    // read edges lines
-    string line;
-    while (getline(gf, line)) {
-        if (line.size()==0) continue;
-        if (line[0]=='#') continue;
-        stringstream ss(line);
-        long long u_ll, v_ll;
-        if (!(ss >> u_ll >> v_ll)) continue;
-        edges.emplace_back(static_cast<int>(u_ll), static_cast<int>(v_ll));
-    }
-    gf.close();
+        vector<pair<int,int>> edges;
+        edges.reserve(M);
+        // read edges lines
+        while (getline(gf, line)) {
+            if (line.size()==0) continue;
+            if (line[0]=='#') continue;
+            stringstream ss(line);
+            long long u_ll, v_ll;
+            if (!(ss >> u_ll >> v_ll)) continue;
+            edges.emplace_back(static_cast<int>(u_ll), static_cast<int>(v_ll));
+        }
+        gf.close();
 
-    if (edges.size() != M) {
-        // Warning but continue if counts differ (some edgelists omit header)
-        cerr << "Warning: expected M=" << M << " edges, but read " << edges.size() << ". Proceeding.\n";
-    }
+        if (edges.size() != M) {
+            // Warning but continue if counts differ (some edgelists omit header)
+            cerr << "Warning: expected M=" << M << " edges, but read " << edges.size() << ". Proceeding.\n";
+        }
 
-    // Build incoming neighbors CSR
-    vector<int> indeg(N, 0);
-    for (auto &e: edges) {
-        int v = e.second;
-        if (v < 0 || static_cast<size_t>(v) >= N) continue;
-        indeg[v]++;
-    }
-    vector<size_t> offsets(N+1, 0);
-    for (size_t i=0;i<N;i++) offsets[i+1] = offsets[i] + indeg[i];
-    vector<int> nbrs(offsets[N], -1);
-    vector<size_t> pos = offsets;
-    for (auto &e: edges) {
-        int u = e.first, v = e.second;
-        if (v < 0 || static_cast<size_t>(v) >= N) continue;
-        nbrs[pos[v]++] = u;
+        // Build incoming neighbors CSR
+        vector<int> indeg(N, 0);
+        for (auto &e: edges) {
+            int v = e.second;
+            if (v < 0 || static_cast<size_t>(v) >= N) continue;
+            indeg[v]++;
+        }
+        offsets.assign(N+1, 0);
+        for (size_t i=0;i<N;i++) offsets[i+1] = offsets[i] + indeg[i];
+        nbrs.assign(offsets[N], -1);
+        vector<size_t> pos = offsets;
+        for (auto &e: edges) {
+            int u = e.first, v = e.second;
+            if (v < 0 || static_cast<size_t>(v) >= N) continue;
+            nbrs[pos[v]++] = u;
+        }
     }
 
-    // Read states
-    ifstream sf(states_file);
-    if (!sf.is_open()) { cerr << "Cannot open states file: " << states_file << endl; return 3; }
+    // Read states: *.bin is N raw little-endian float32 values (build_graph.py --binary),
+    // anything else is text with one value per line
     vector<double> states(N, 0.0);
     size_t read_count = 0;
-    while (read_count < N && getline(sf, line)) {
-        if (line.size()==0) continue;
-        if (line[0]=='#') continue;
-        stringstream ss(line);
-        double val;
-        if (!(ss >> val)) continue;
-        states[read_count++] = val;
+    if (ends_with(states_file, ".bin")) {
+        FILE* sfp = fopen(states_file.c_str(), "rb");
+        if (!sfp) { cerr << "Cannot open states file: " << states_file << endl; return 3; }
+        vector<float> buf(N);
+        read_count = fread(buf.data(), sizeof(float), N, sfp);
+        fclose(sfp);
+        for (size_t i=0;i<read_count;i++) states[i] = buf[i];
+    } else {
+        ifstream sf(states_file);
+        if (!sf.is_open()) { cerr << "Cannot open states file: " << states_file << endl; return 3; }
+        while (read_count < N && getline(sf, line)) {
+            if (line.size()==0) continue;
+            if (line[0]=='#') continue;
+            stringstream ss(line);
+            double val;
+            if (!(ss >> val)) continue;
+            states[read_count++] = val;
+        }
+        sf.close();
     }
-    sf.close();
     if (read_count < N) {
         cerr << "states file had fewer than N entries (" << read_count << " < " << N << ")\n";
         return 4;
     }
 
-    // Optimize chunk size: larger chunks reduce overhead for small graphs
-    // For large graphs, use smaller chunks for better load balance
-    // For high thread counts, use larger chunks to reduce contention
-    int used_threads = (threads > 0) ? threads : omp_get_max_threads();
-    int chunk = 1;
-    const char* chunk_env = getenv("OMP_CHUNK_SIZE");
-    if (chunk_env && atoi(chunk_env) > 0) {
-        chunk = atoi(chunk_env);
-    } else {
-        // Auto-tune chunk size based on graph size and thread count
-        // Optimized for scalability up to 10 threads with very large graphs (50K+ nodes)
-        if (N < 1000) {
-            chunk = std::max(1, (int)(N / (used_threads * 4)));
-        } else if (N < 10000) {
-            // For medium graphs, adjust chunk based on thread count
-            if (used_threads <= 4) {
-                chunk = std::max(1, (int)(N / (used_threads * 8)));
-            } else if (used_threads <= 6) {
-                chunk = std::max(1, (int)(N / (used_threads * 4)));
-            } else if (used_threads <= 8) {
-                chunk = std::max(1, (int)(N / (used_threads * 3)));
-            } else {
-                // For 9-10 threads, use larger chunks to minimize overhead
-                chunk = std::max(1, (int)(N / (used_threads * 2)));
-            }
-        } else if (N < 30000) {
-            // For large graphs (10K-30K), optimize for 10-thread scalability
-            if (used_threads <= 4) {
-                chunk = std::max(1, (int)(N / (used_threads * 16)));
-            } else if (used_threads <= 6) {
-                chunk = std::max(1, (int)(N / (used_threads * 10)));
-            } else if (used_threads <= 8) {
-                chunk = std::max(1, (int)(N / (used_threads * 6)));
-            } else {
-                // For 9-10 threads on large graphs, use medium chunks
-                chunk = std::max(1, (int)(N / (used_threads * 5)));
-            }
-        } else if (N < 50000) {
-            // For very large graphs (30K-50K), optimize for 10-thread scalability
-            if (used_threads <= 4) {
-                chunk = std::max(1, (int)(N / (used_threads * 20)));
-            } else if (used_threads <= 6) {
-                chunk = std::max(1, (int)(N / (used_threads * 12)));
-            } else if (used_threads <= 8) {
-                chunk = std::max(1, (int)(N / (used_threads * 8)));
-            } else {
-                // For 9-10 threads on very large graphs, use balanced chunks
-                chunk = std::max(1, (int)(N / (used_threads * 6)));
-            }
+    // Run each requested thread count over the graph loaded above; a sweep
+    // ("1,2,4,8") restarts from the initial states and suffixes the outputs with _t<k>
+    const bool sweep = thread_list.size() > 1;
+    const vector<double> initial_states = sweep ? states : vector<double>();
+    if (sweep) cout << "threads,time\n";
+    for (size_t ci = 0; ci < thread_list.size(); ++ci) {
+        StreamFormatGuard cerr_format(cerr);
+        int threads = thread_list[ci];
+        int used_threads = (threads > 0) ? threads : default_thread_count();
+        omp_set_num_threads(used_threads);
+        if (ci > 0) states = initial_states;
+
+        // Optimize chunk size: larger chunks reduce overhead for small graphs
+        // For large graphs, use smaller chunks for better load balance
+        // For high thread counts, use larger chunks to reduce contention
+        int chunk = 1;
+        const char* chunk_env = getenv("OMP_CHUNK_SIZE");
+        if (chunk_env && atoi(chunk_env) > 0) {
+            chunk = atoi(chunk_env);
         } else {
-            // For extremely large graphs (50K+), optimize for 10-thread scalability
-            if (used_threads <= 4) {
-                chunk = std::max(1, (int)(N / (used_threads * 25)));
-            } else if (used_threads <= 6) {
-                chunk = std::max(1, (int)(N / (used_threads * 15)));
-            } else if (used_threads <= 8) {
-                chunk = std::max(1, (int)(N / (used_threads * 10)));
+            // Auto-tune chunk size based on graph size and thread count
+            // Optimized for scalability up to 10 threads with very large graphs (50K+ nodes)
+            if (N < 1000) {
+                chunk = std::max(1, (int)(N / (used_threads * 4)));
+            } else if (N < 10000) {
+                // For medium graphs, adjust chunk based on thread count
+                if (used_threads <= 4) {
+                    chunk = std::max(1, (int)(N / (used_threads * 8)));
+                } else if (used_threads <= 6) {
+                    chunk = std::max(1, (int)(N / (used_threads * 4)));
+                } else if (used_threads <= 8) {
+                    chunk = std::max(1, (int)(N / (used_threads * 3)));
+                } else {
+                    // For 9-10 threads, use larger chunks to minimize overhead
+                    chunk = std::max(1, (int)(N / (used_threads * 2)));
+                }
+            } else if (N < 30000) {
+                // For large graphs (10K-30K), optimize for 10-thread scalability
+                if (used_threads <= 4) {
+                    chunk = std::max(1, (int)(N / (used_threads * 16)));
+                } else if (used_threads <= 6) {
+                    chunk = std::max(1, (int)(N / (used_threads * 10)));
+                } else if (used_threads <= 8) {
+                    chunk = std::max(1, (int)(N / (used_threads * 6)));
+                } else {
+                    // For 9-10 threads on large graphs, use medium chunks
+                    chunk = std::max(1, (int)(N / (used_threads * 5)));
+                }
+            } else if (N < 50000) {
+                // For very large graphs (30K-50K), optimize for 10-thread scalability
+                if (used_threads <= 4) {
+                    chunk = std::max(1, (int)(N / (used_threads * 20)));
+                } else if (used_threads <= 6) {
+                    chunk = std::max(1, (int)(N / (used_threads * 12)));
+                } else if (used_threads <= 8) {
+                    chunk = std::max(1, (int)(N / (used_threads * 8)));
+                } else {
+                    // For 9-10 threads on very large graphs, use balanced chunks
+                    chunk = std::max(1, (int)(N / (used_threads * 6)));
+                }
             } else {
-                // For 9-10 threads on extremely large graphs, use optimized chunks
-                chunk = std::max(1, (int)(N / (used_threads * 8)));
+                // For extremely large graphs (50K+), optimize for 10-thread scalability
+                if (used_threads <= 4) {
+                    chunk = std::max(1, (int)(N / (used_threads * 25)));
+                } else if (used_threads <= 6) {
+                    chunk = std::max(1, (int)(N / (used_threads * 15)));
+                } else if (used_threads <= 8) {
+                    chunk = std::max(1, (int)(N / (used_threads * 10)));
+                } else {
+                    // For 9-10 threads on extremely large graphs, use optimized chunks
+                    chunk = std::max(1, (int)(N / (used_threads * 8)));
+                }
             }
         }
-    }
 
-    // Align arrays to cache line boundaries to avoid false sharing
-    // Use separate arrays per thread for reduction to minimize contention
-    vector<double> new_states(N, 0.0);
-    vector<double> history;
-    history.reserve(T);
+        // Align arrays to cache line boundaries to avoid false sharing
+        // Use separate arrays per thread for reduction to minimize contention
+        vector<double> new_states(N, 0.0);
+        vector<double> history;
+        history.reserve(T);
 
-    double t_start = omp_get_wtime();
-    int print_interval = std::max(1, T / 20);  // Print ~20 progress updates
+        double t_start = omp_get_wtime();
+        int print_interval = std::max(1, T / 20);  // Print ~20 progress updates
     
-    cerr << "[Parallel] Starting simulation: " << T << " steps, " << N << " nodes, alpha=" << alpha << ", threads=" << used_threads << "\n";
-    cerr.flush();
+        cerr << "[Parallel] Starting simulation: " << T << " steps, " << N << " nodes, alpha=" << alpha << ", threads=" << used_threads << "\n";
+        cerr.flush();
     
-    for (int t=0; t<T; ++t) {
-        double global_sum = 0.0;
+        for (int t=0; t<T; ++t) {
+            double global_sum = 0.0;
         
-        // Choose scheduling strategy based on graph size and thread count
-        // For high thread counts, dynamic scheduling can help with load imbalance
-        if (N < 500) {
-            // Use guided scheduling for small graphs to minimize overhead
-            #pragma omp parallel for reduction(+:global_sum) schedule(guided)
-            for (size_t v=0; v<N; ++v) {
-                size_t start = offsets[v];
-                size_t end = offsets[v+1];
-                if (start == end) {
-                    new_states[v] = states[v];
-                } else {
-                    double sum = 0.0;
-                    for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
-                    double avg = sum / double(end - start);
-                    new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+            // Choose scheduling strategy based on graph size and thread count
+            // For high thread counts, dynamic scheduling can help with load imbalance
+            if (N < 500) {
+                // Use guided scheduling for small graphs to minimize overhead
+                #pragma omp parallel for reduction(+:global_sum) schedule(guided)
+                for (size_t v=0; v<N; ++v) {
+                    size_t start = offsets[v];
+                    size_t end = offsets[v+1];
+                    if (start == end) {
+                        new_states[v] = states[v];
+                    } else {
+                        double sum = 0.0;
+                        PU_NEIGHBOR_SIMD
+                        for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
+                        double avg = sum / double(end - start);
+                        new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+                    }
+                    global_sum += new_states[v];
                 }
-                global_sum += new_states[v];
-            }
-        } else if (used_threads > 8) {
-            // For 9-10 threads, use dynamic scheduling with optimized chunk size
-            // Critical for very large graphs (50K+) to handle memory bandwidth saturation
-            #pragma omp parallel for reduction(+:global_sum) schedule(dynamic, chunk)
-            for (size_t v=0; v<N; ++v) {
-                size_t start = offsets[v];
-                size_t end = offsets[v+1];
-                if (start == end) {
-                    new_states[v] = states[v];
-                } else {
-                    double sum = 0.0;
-                    for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
-                    double avg = sum / double(end - start);
-                    new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+            } else if (used_threads > 8) {
+                // For 9-10 threads, use dynamic scheduling with optimized chunk size
+                // Critical for very large graphs (50K+) to handle memory bandwidth saturation
+                #pragma omp parallel for reduction(+:global_sum) schedule(dynamic, chunk)
+                for (size_t v=0; v<N; ++v) {
+                    size_t start = offsets[v];
+                    size_t end = offsets[v+1];
+                    if (start == end) {
+                        new_states[v] = states[v];
+                    } else {
+                        double sum = 0.0;
+                        PU_NEIGHBOR_SIMD
+                        for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
+                        double avg = sum / double(end - start);
+                        new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+                    }
+                    global_sum += new_states[v];
                 }
-                global_sum += new_states[v];
-            }
-        } else if (used_threads > 6) {
-            // For 7-8 threads, use dynamic scheduling with optimized chunk size
-            // This helps when memory bandwidth becomes a bottleneck
-            #pragma omp parallel for reduction(+:global_sum) schedule(dynamic, chunk)
-            for (size_t v=0; v<N; ++v) {
-                size_t start = offsets[v];
-                size_t end = offsets[v+1];
-                if (start == end) {
-                    new_states[v] = states[v];
-                } else {
-                    double sum = 0.0;
-                    for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
-                    double avg = sum / double(end - start);
-                    new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+            } else if (used_threads > 6) {
+                // For 7-8 threads, use dynamic scheduling with optimized chunk size
+                // This helps when memory bandwidth becomes a bottleneck
+                #pragma omp parallel for reduction(+:global_sum) schedule(dynamic, chunk)
+                for (size_t v=0; v<N; ++v) {
+                    size_t start = offsets[v];
+                    size_t end = offsets[v+1];
+                    if (start == end) {
+                        new_states[v] = states[v];
+                    } else {
+                        double sum = 0.0;
+                        PU_NEIGHBOR_SIMD
+                        for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
+                        double avg = sum / double(end - start);
+                        new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+                    }
+                    global_sum += new_states[v];
                 }
-                global_sum += new_states[v];
-            }
-        } else if (used_threads > 4) {
-            // For 5-6 threads, use dynamic scheduling for better load balance
-            #pragma omp parallel for reduction(+:global_sum) schedule(dynamic, chunk)
-            for (size_t v=0; v<N; ++v) {
-                size_t start = offsets[v];
-                size_t end = offsets[v+1];
-                if (start == end) {
-                    new_states[v] = states[v];
-                } else {
-                    double sum = 0.0;
-                    for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
-                    double avg = sum / double(end - start);
-                    new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+            } else if (used_threads > 4) {
+                // For 5-6 threads, use dynamic scheduling for better load balance
+                #pragma omp parallel for reduction(+:global_sum) schedule(dynamic, chunk)
+                for (size_t v=0; v<N; ++v) {
+                    size_t start = offsets[v];
+                    size_t end = offsets[v+1];
+                    if (start == end) {
+                        new_states[v] = states[v];
+                    } else {
+                        double sum = 0.0;
+                        PU_NEIGHBOR_SIMD
+                        for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
+                        double avg = sum / double(end - start);
+                        new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+                    }
+                    global_sum += new_states[v];
                 }
-                global_sum += new_states[v];
-            }
-        } else {
-            // Use static scheduling with optimized chunk for lower thread counts
-            #pragma omp parallel for reduction(+:global_sum) schedule(static,chunk)
-            for (size_t v=0; v<N; ++v) {
-                size_t start = offsets[v];
-                size_t end = offsets[v+1];
-                if (start == end) {
-                    new_states[v] = states[v];
-                } else {
-                    double sum = 0.0;
-                    for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
-                    double avg = sum / double(end - start);
-                    new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+            } else {
+                // Use static scheduling with optimized chunk for lower thread counts
+                #pragma omp parallel for reduction(+:global_sum) schedule(static,chunk)
+                for (size_t v=0; v<N; ++v) {
+                    size_t start = offsets[v];
+                    size_t end = offsets[v+1];
+                    if (start == end) {
+                        new_states[v] = states[v];
+                    } else {
+                        double sum = 0.0;
+                        PU_NEIGHBOR_SIMD
+                        for (size_t j=start; j<end; ++j) sum += states[ static_cast<size_t>(nbrs[j]) ];
+                        double avg = sum / double(end - start);
+                        new_states[v] = (1.0 - alpha) * states[v] + alpha * avg;
+                    }
+                    global_sum += new_states[v];
                 }
-                global_sum += new_states[v];
             }
-        }
-        states.swap(new_states);
-        history.push_back(global_sum / double(N));
+            states.swap(new_states);
+            history.push_back(global_sum / double(N));
         
-        // Progress logging
-        if (t % print_interval == 0 || t == T - 1) {
-            double elapsed = omp_get_wtime() - t_start;
-            double progress = 100.0 * (t + 1) / T;
-            double rate = (t + 1) / elapsed;
-            double eta = (T - t - 1) / rate;
-            double avg_sentiment = history.back();
-            cerr << "\r[Parallel] Step " << (t+1) << "/" << T << " (" << fixed << setprecision(1) << progress 
-                 << "%) | Avg sentiment: " << setprecision(6) << avg_sentiment 
-                 << " | Elapsed: " << setprecision(1) << elapsed << "s"
-                 << " | ETA: " << setprecision(1) << eta << "s"
-                 << " | Rate: " << setprecision(0) << rate << " steps/s" << flush;
+            // Progress logging
+            if (t % print_interval == 0 || t == T - 1) {
+                double elapsed = omp_get_wtime() - t_start;
+                double progress = 100.0 * (t + 1) / T;
+                double rate = (t + 1) / elapsed;
+                double eta = (T - t - 1) / rate;
+                double avg_sentiment = history.back();
+                cerr << "\r[Parallel] Step " << (t+1) << "/" << T << " (" << fixed << setprecision(1) << progress 
+                     << "%) | Avg sentiment: " << setprecision(6) << avg_sentiment 
+                     << " | Elapsed: " << setprecision(1) << elapsed << "s"
+                     << " | ETA: " << setprecision(1) << eta << "s"
+                     << " | Rate: " << setprecision(0) << rate << " steps/s" << flush;
+            }
         }
-    }
     
-    cerr << "\n";  // New line after progress
-    double t_end = omp_get_wtime();
-    double total_time = t_end - t_start;
-    cerr << "[Parallel] Completed " << T << " steps in " << fixed << setprecision(2) << total_time 
-         << "s (" << setprecision(0) << (T / total_time) << " steps/s)\n";
+        cerr << "\n";  // New line after progress
+        double t_end = omp_get_wtime();
+        double total_time = t_end - t_start;
+        cerr << "[Parallel] Completed " << T << " steps in " << fixed << setprecision(2) << total_time 
+             << "s (" << setprecision(0) << (T / total_time) << " steps/s)\n";
 
-    // write history
-    ofstream hf(history_file);
-    if (!hf.is_open()) { cerr << "Cannot write history file\n"; return 5; }
-    for (double x: history) hf << x << "\n";
-    hf.close();
+        // write history
+        string hist_path = sweep ? with_thread_suffix(history_file, used_threads) : history_file;
+        if (ends_with(hist_path, ".npy")) {
+            if (!write_npy(hist_path, history)) { cerr << "Cannot write history file\n"; return 5; }
+        } else {
+            ofstream hf(hist_path);
+            if (!hf.is_open()) { cerr << "Cannot write history file\n"; return 5; }
+            for (double x: history) hf << x << "\n";
+            hf.close();
+        }
+
+        // write final states
+        string out_path = sweep ? with_thread_suffix(out_states_file, used_threads) : out_states_file;
+        if (ends_with(out_path, ".npy")) {
+            if (!write_npy(out_path, states)) { cerr << "Cannot write output states file\n"; return 6; }
+        } else {
+            ofstream of(out_path);
+            if (!of.is_open()) { cerr << "Cannot write output states file\n"; return 6; }
+            for (size_t i=0;i<N;i++) of << states[i] << "\n";
+            of.close();
+        }
 
-    // write final states
-    ofstream of(out_states_file);
-    if (!of.is_open()) { cerr << "Cannot write output states file\n"; return 6; }
-    for (size_t i=0;i<N;i++) of << states[i] << "\n";
-    of.close();
+        if (sweep) cout << used_threads << "," << total_time << "\n" << flush;
+    }
 
     // Already printed detailed info above
     return 0;
 }
+
+int main(int argc, char** argv) {
+    default_thread_count();  // capture before any omp_set_num_threads call
+    if (argc == 3 && string(argv[1]) == "--manifest") {
+        // Batch mode: each non-empty, non-# line holds the usual arguments
+        // ("graph states out hist T [alpha] [threads]"); all cases share one process
+        // and its OpenMP thread pool. Stops at the first failing case.
+        ifstream mf(argv[2]);
+        if (!mf.is_open()) { cerr << "Cannot open manifest: " << argv[2] << endl; return 1; }
+        string line;
+        int case_no = 0;
+        while (getline(mf, line)) {
+            if (line.empty() || line[0] == '#') continue;
+            vector<string> args = {argv[0]};
+            stringstream ls(line);
+            string tok;
+            while (ls >> tok) args.push_back(tok);
+            if (args.size() == 1) continue;
+            vector<char*> case_argv;
+            for (auto& a: args) case_argv.push_back(&a[0]);
+            ++case_no;
+            int rc = run_case(static_cast<int>(case_argv.size()), case_argv.data());
+            if (rc != 0) { cerr << "Manifest case " << case_no << " failed (exit " << rc << ")\n"; return rc; }
+        }
+        return 0;
+    }
+    return run_case(argc, argv);
+}
+#endif  // PU_SHARED_LIB
@@ -7,55 +7,124 @@ Inputs:
 Outputs:
   - data/graph.txt (first line: N M, then M lines "u v" where u/v are 0-indexed integers)
   - data/states.txt (N lines, float per node in same node ordering)
+  - data/states.bin instead, with --binary (N little-endian float32 values, same ordering)
+  - data/graph.csr too, with --csr (little-endian int64 N, M, int64 row_ptr[N+1] and
+    int32 col[M]: incoming neighbors grouped by destination node)
   - py/node_index.json (mapping original_id -> index)
 """
 import argparse, json
-import networkx as nx
+import numpy as np
 import pandas as pd
+from csr_io import write_csr
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:  # optional; fall back to the pandas C parser
+    pa = None
+
+# large write buffer: edge/state dumps run to hundreds of MB
+WRITE_BUFFER = 1 << 24
+# rows formatted per write: bounds the Python ints and text held at once (~40 MB per edge chunk)
+CHUNK_ROWS = 1 << 20
+
+def read_edge_ids(path):
+    """Return (codes, nodes): u/v codes interleaved per edge, numbered in first-appearance order."""
+    if pa is not None:
+        # Arrow's multithreaded reader handles the common single-space edgelist;
+        # irregular rows (tabs, short lines, extra columns) fall through to pandas
+        try:
+            tbl = pacsv.read_csv(path, read_options=pacsv.ReadOptions(column_names=['u', 'v']),
+                                 parse_options=pacsv.ParseOptions(delimiter=' '),
+                                 convert_options=pacsv.ConvertOptions(column_types={'u': pa.string(), 'v': pa.string()}))
+            both = pa.concat_arrays(tbl.column('u').chunks + tbl.column('v').chunks)
+            if not pc.any(pc.equal(pc.utf8_length(both), 0)).as_py():
+                M = tbl.num_rows
+                ids = pc.take(both, np.arange(2 * M).reshape(2, M).T.ravel())
+                enc = ids.dictionary_encode()
+                return enc.indices.to_numpy(), enc.dictionary.to_numpy(zero_copy_only=False)
+        except pa.ArrowInvalid:
+            pass
+    df = pd.read_csv(path, sep=r'\s+', header=None, names=['u', 'v'], usecols=[0, 1],
+                     dtype=str, engine='c', memory_map=True).dropna()
+    # interleave u/v so node ids are numbered in first-appearance order
+    return pd.factorize(df.to_numpy().ravel(), sort=False)
+
+def write_edges(f, edges):
+    """Write "u v" lines, CHUNK_ROWS edges per formatted buffer."""
+    for lo in range(0, len(edges), CHUNK_ROWS):
+        chunk = edges[lo:lo + CHUNK_ROWS]
+        f.write(("%d %d\n" * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+def write_states(f, states):
+    """Write one repr() per line, formatting each distinct value only once."""
+    # most nodes share a handful of values (unknown users default to 0.0); key on the
+    # bit pattern so -0.0 and nan keep their own spelling
+    bits, inv = np.unique(np.ascontiguousarray(states, dtype=np.float64).view(np.int64), return_inverse=True)
+    lines = np.array([f"{x!r}\n" for x in bits.view(np.float64).tolist()], dtype=object)
+    inv = inv.ravel()
+    for lo in range(0, len(inv), CHUNK_ROWS):
+        f.write("".join(lines[inv[lo:lo + CHUNK_ROWS]].tolist()))
 
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("--edgelist", required=True, help="Raw edgelist (u v per line) using original user ids")
     p.add_argument("--per-user", required=True, help="CSV user_id,sentiment")
     p.add_argument("--out-dir", default="data")
+    p.add_argument("--binary", action="store_true", help="Write states.bin (raw float32) instead of states.txt")
+    p.add_argument("--csr", action="store_true", help="Also write graph.csr (binary incoming-neighbor CSR)")
     opt = p.parse_args()
 
     # load edgelist as strings (some ids may be numeric or text handles)
-    G = nx.DiGraph()
     print("Reading edgelist:", opt.edgelist)
-    with open(opt.edgelist, 'r', encoding='utf-8') as f:
-        for line in f:
-            parts = line.strip().split()
-            if len(parts) < 2: continue
-            u, v = parts[0], parts[1]
-            G.add_edge(u, v)
-    nodes = list(G.nodes())
+    codes, nodes = read_edge_ids(opt.edgelist)
     N = len(nodes)
-    print("Nodes:", N, "Edges:", G.number_of_edges())
+    u_idx, v_idx = codes[0::2].astype(np.int64), codes[1::2].astype(np.int64)
+    # drop repeated edges (keep first occurrence), then group by source like DiGraph.edges()
+    _, first = np.unique(u_idx * N + v_idx, return_index=True)
+    first.sort()
+    u_idx, v_idx = u_idx[first], v_idx[first]
+    order = np.argsort(u_idx, kind='stable')
+    edges = np.column_stack((u_idx[order], v_idx[order])).astype(np.int32)
+    # drop the int64 working copies (~40 bytes/edge) before the output buffers are built
+    del codes, u_idx, v_idx, first, order
+    print("Nodes:", N, "Edges:", len(edges))
 
-    # build index map
-    idx = {node: i for i,node in enumerate(nodes)}
-    # write graph.txt
-    edges = [(idx[u], idx[v]) for u,v in G.edges()]
-    with open(f"{opt.out_dir}/graph.txt", "w", encoding='utf-8') as gf:
+    # write graph.txt: formatted and written in fixed-size chunks of edges
+    with open(f"{opt.out_dir}/graph.txt", "w", encoding='utf-8', buffering=WRITE_BUFFER) as gf:
         gf.write(f"{N} {len(edges)}\n")
-        for u,v in edges:
-            gf.write(f"{u} {v}\n")
+        write_edges(gf, edges)
     print("Wrote", f"{opt.out_dir}/graph.txt")
 
+    if opt.csr:
+        write_csr(f"{opt.out_dir}/graph.csr", N, edges, buffering=WRITE_BUFFER)
+        print("Wrote", f"{opt.out_dir}/graph.csr")
+    # edges are fully written; release them before pandas loads the sentiment frame
+    del edges
+
     # load per-user sentiment
-    df = pd.read_csv(opt.per_user, dtype={'user_id': str})
-    sentiment_map = dict(zip(df['user_id'].astype(str), df['sentiment'].astype(float)))
+    # single pass: only the two needed columns, typed up front, undecodable bytes replaced
+    # rather than retried under other encodings
+    sentiment = pd.read_csv(opt.per_user, usecols=['user_id', 'sentiment'], index_col='user_id',
+                            dtype={'user_id': str, 'sentiment': np.float64}, engine='c',
+                            encoding_errors='replace')['sentiment']
+    sentiment = sentiment[~sentiment.index.duplicated(keep='last')]
     # write states in node order, default 0.0
-    with open(f"{opt.out_dir}/states.txt", "w", encoding='utf-8') as sf:
-        for node in nodes:
-            s = sentiment_map.get(str(node), 0.0)
-            sf.write(f"{float(s)}\n")
-    print("Wrote", f"{opt.out_dir}/states.txt")
+    states = sentiment.reindex(nodes, fill_value=0.0).to_numpy()
+    if opt.binary:
+        states.astype('<f4').tofile(f"{opt.out_dir}/states.bin")
+        print("Wrote", f"{opt.out_dir}/states.bin")
+    else:
+        with open(f"{opt.out_dir}/states.txt", "w", encoding='utf-8', buffering=WRITE_BUFFER) as sf:
+            write_states(sf, states)
+        print("Wrote", f"{opt.out_dir}/states.txt")
 
     # save mapping
-    with open("data/node_index.json", "w", encoding='utf-8') as jf:
-        json.dump(idx, jf)
+    idx = dict(zip(nodes.tolist(), range(N)))
+    # json.dumps takes the C encoder's one-shot path; json.dump would stream through the
+    # pure-Python iterencode
+    with open("data/node_index.json", "w", encoding='utf-8', buffering=WRITE_BUFFER) as jf:
+        jf.write(json.dumps(idx))
     print("Wrote data/node_index.json (original_id -> index).")
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+compare_results.py
+
+Check that two simulator outputs (histories or final states; .npy or one value per
+line) agree, e.g. serial_sim.py against cpp/bin/parallel_update.
+
+.npy inputs are memory-mapped and compared in fixed-size chunks, so peak memory
+stays bounded however large the outputs are.
+
+The default tolerance is relative and grows with the work behind each value,
+rtol = 4 * eps * steps * max_fanin, so reordered sums (omp simd, FMA contraction,
+reductions over a different thread count) pass while real divergence does not.
+Text output from the C++ binary only keeps 6 significant digits: write .npy there,
+or pass --rtol 1e-5.
+
+--check-invariants needs no reference run: it checks one simulator's final states
+(and history) against properties of the update itself, so large graphs can be
+verified without the slow Python oracle.
+
+Usage:
+    python py/compare_results.py results/serial_history.npy results/history.npy --history --graph data/graph.txt
+    python py/compare_results.py results/serial_final.npy results/out.npy --steps 100 --graph data/graph.txt
+    python py/compare_results.py results/out.npy results/history.npy --check-invariants data/states.txt --alpha 0.3
+"""
+import argparse
+import sys
+import numpy as np
+from serial_sim import check_invariants, read_graph, read_states
+
+def load_values(path):
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    return np.loadtxt(path, dtype=np.float64, ndmin=1)
+
+# values per comparison chunk (1 MiB of float64 per operand): bounded temporaries, cache-sized
+CHUNK = 1 << 17
+
+def compare(a, b, rtol, atol=0.0):
+    """Streamed assert_allclose: (violations, max |a-b|, first violating index or None)"""
+    bad, max_diff, first = 0, 0.0, None
+    for lo in range(0, len(a), CHUNK):
+        ca = np.asarray(a[lo:lo + CHUNK], dtype=np.float64)
+        cb = np.asarray(b[lo:lo + CHUNK], dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            diff = np.abs(ca - cb)
+        diff[ca == cb] = 0.0  # matching infinities agree (inf - inf is NaN), as in assert_allclose
+        # an infinite reference would make the tolerance infinite: infinities must match exactly
+        inf = np.isinf(ca) | np.isinf(cb)
+        # negated <= so NaN differences count as violations too
+        over = ~(diff <= atol + rtol * np.abs(np.where(inf, 0.0, cb))) | (inf & (ca != cb))
+        n_over = int(np.count_nonzero(over))
+        if n_over and first is None:
+            first = lo + int(np.argmax(over))
+        bad += n_over
+        # np.maximum (unlike max()) keeps a NaN once seen, so the report shows it
+        max_diff = float(np.maximum(max_diff, diff.max(initial=0.0)))
+    return bad, max_diff, first
+
+def default_rtol(steps, max_fanin=1):
+    """Step-scaled relative bound: each step adds at most max_fanin roundings per value"""
+    return 4 * np.finfo(np.float64).eps * max(1, steps) * max(1, max_fanin)
+
+def check_outputs(p, opt):
+    """--check-invariants mode: reference-free checks on one run's output files"""
+    if opt.alpha is None:
+        p.error("--check-invariants needs --alpha")
+    init = opt.check_invariants
+    s0 = read_states(init) if not init.endswith('.npy') else load_values(init)
+    final = load_values(opt.a)
+    history = load_values(opt.b) if opt.b else None
+    if opt.steps is not None:
+        steps = opt.steps
+    elif history is not None:
+        steps = len(history)
+    else:
+        p.error("--steps is required when no history is given")
+    problems = check_invariants(s0, final, history, steps, opt.alpha)
+    if problems is None:
+        print(f"SKIPPED: invariants only hold for 0 <= alpha <= 1 and N > 0 (alpha={opt.alpha}, N={len(s0)})")
+    elif problems:
+        print("INVARIANT VIOLATED: " + "; ".join(problems), file=sys.stderr)
+        sys.exit(1)
+    else:
+        print(f"OK: {len(final)} final states{' and history' if history is not None else ''} "
+              f"within the initial range")
+
+def main():
+    p = argparse.ArgumentParser(description="Compare two simulator outputs within a step-scaled tolerance")
+    p.add_argument("a", help="output to compare (final states with --check-invariants)")
+    p.add_argument("b", nargs='?', help="output to compare against (optional history with --check-invariants)")
+    p.add_argument("--check-invariants", metavar="INITIAL_STATES",
+                   help="instead of comparing, check a (final states) and b (history, optional) of any "
+                        "simulator against the initial states; needs --alpha")
+    p.add_argument("--alpha", type=float, help="alpha of the run, for --check-invariants")
+    p.add_argument("--steps", type=int, help="simulation steps; required for the default tolerance unless --history")
+    p.add_argument("--history", action="store_true",
+                   help="inputs are per-step histories, so their length is the step count")
+    p.add_argument("--graph", help="graph file, to scale the tolerance by the maximum in-degree")
+    p.add_argument("--rtol", type=float, help="override the step-scaled relative tolerance")
+    p.add_argument("--atol", type=float, default=0.0)
+    opt = p.parse_args()
+
+    if opt.check_invariants:
+        check_outputs(p, opt)
+        return
+    if opt.b is None:
+        p.error("two outputs are required to compare")
+    a, b = load_values(opt.a), load_values(opt.b)
+    if a.shape != b.shape:
+        raise SystemExit(f"shape mismatch: {opt.a} {a.shape} vs {opt.b} {b.shape}")
+    rtol = opt.rtol
+    if rtol is None:
+        # a final-state file's length is N, not the step count, so never guess steps from it
+        if opt.steps is None and not opt.history:
+            p.error("--steps is required to derive the tolerance (or pass --history, or --rtol)")
+        max_fanin = 1
+        if opt.graph:
+            _, indptr, _ = read_graph(opt.graph)
+            max_fanin = int(np.diff(indptr).max(initial=1))
+        rtol = default_rtol(opt.steps if opt.steps is not None else len(a), max_fanin)
+
+    bad, max_diff, first = compare(a, b, rtol, opt.atol)
+    if bad:
+        print(f"MISMATCH: {bad}/{len(a)} values outside rtol={rtol:.3g}, atol={opt.atol:.3g} "
+              f"(max |a-b| = {max_diff:.3g}; first at index {first}: {float(a[first])!r} vs {float(b[first])!r})", file=sys.stderr)
+        sys.exit(1)
+    print(f"OK: {len(a)} values agree (max |a-b| = {max_diff:.3g}, rtol={rtol:.3g})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+csr_io.py
+
+Incoming-neighbor CSR helpers shared by serial_sim.py, build_graph.py and graph_to_bin.py.
+NumPy only, so the writers do not pay for importing numba.
+
+graph.csr layout: little-endian int64 N, M, int64 row_ptr[N+1], int32 col[M]
+(col[row_ptr[v]:row_ptr[v+1]] are v's sources).
+"""
+import numpy as np
+
+def csr_from_edges(N, edges):
+    """(M, 2) "u v" edge array -> (indptr, indices) incoming-neighbor CSR"""
+    edges=np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+    src, dst = edges[:,0], edges[:,1]
+    # stable sort keeps each node's sources in edge order (same summation order as the C++ code)
+    order=np.argsort(dst, kind='stable')
+    indptr=np.zeros(N+1, dtype=np.int64)
+    np.cumsum(np.bincount(dst, minlength=N), out=indptr[1:])
+    return indptr, src[order]
+
+def write_csr(path, N, edges, buffering=-1):
+    """Write the binary graph.csr read by serial_sim.read_graph; returns M"""
+    indptr, indices = csr_from_edges(N, edges)
+    with open(path, 'wb', buffering=buffering) as f:
+        np.array([N, len(indices)], dtype='<i8').tofile(f)
+        indptr.astype('<i8', copy=False).tofile(f)
+        indices.astype('<i4', copy=False).tofile(f)
+    return len(indices)
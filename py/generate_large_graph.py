@@ -7,22 +7,33 @@ Creates graphs with configurable number of nodes and edges using various models:
 - Barabasi-Albert (scale-free, like real social networks)
 - Erdos-Renyi (random)
 - Watts-Strogatz (small-world)
+- R-MAT (power-law, generated on the GPU with RAPIDS cuGraph via --device gpu)
 
 Usage:
     python py/generate_large_graph.py --nodes 10000 --model barabasi --out data/raw/large_graph.edges
+    python py/generate_large_graph.py --nodes 10000000 --device gpu --out data/raw/huge_graph.edges
 """
 import argparse
 import numpy as np
 import networkx as nx
 import os
 
+# large write buffer: edge/state dumps run to hundreds of MB
+WRITE_BUFFER = 1 << 24
+# rows formatted per write: bounds the Python ints and text held at once (~40 MB per edge chunk)
+CHUNK_ROWS = 1 << 20
+
+def edge_array(G):
+    """Return G's edges as an (M, 2) int64 array"""
+    return np.fromiter(G.edges(), dtype=np.dtype((np.int64, 2)), count=G.number_of_edges())
+
 def generate_barabasi_albert(nodes, edges_per_node=5, seed=42):
     """Generate Barabasi-Albert scale-free graph (like real social networks)"""
     np.random.seed(seed)
     # BA model: start with m0 nodes, add nodes with m edges each
     m = max(1, edges_per_node // 2)
     G = nx.barabasi_albert_graph(nodes, m, seed=seed)
-    return G
+    return edge_array(G)
 
 def generate_erdos_renyi(nodes, p=None, seed=42):
     """Generate Erdos-Renyi random graph"""
@@ -30,50 +41,67 @@ def generate_erdos_renyi(nodes, p=None, seed=42):
     if p is None:
         # Default: average degree ~10
         p = 10.0 / nodes
-    G = nx.erdos_renyi_graph(nodes, p, seed=seed, directed=False)
-    return G
+    # fast_gnp_random_graph samples edges in O(n + m) instead of testing all n^2 pairs
+    G = nx.fast_gnp_random_graph(nodes, p, seed=seed, directed=False)
+    return edge_array(G)
 
 def generate_watts_strogatz(nodes, k=10, p=0.1, seed=42):
     """Generate Watts-Strogatz small-world graph"""
     np.random.seed(seed)
     G = nx.watts_strogatz_graph(nodes, k, p, seed=seed)
-    return G
+    return edge_array(G)
 
 def generate_social_like(nodes, avg_degree=10, seed=42):
     """Generate a more realistic social network: combination of models"""
     np.random.seed(seed)
     # Start with BA for hub structure
-    G1 = generate_barabasi_albert(nodes, avg_degree // 2, seed=seed)
+    E1 = generate_barabasi_albert(nodes, avg_degree // 2, seed=seed)
     # Add some random connections
-    G2 = generate_erdos_renyi(nodes, p=avg_degree/(2*nodes), seed=seed+1)
-    # Combine
-    G = nx.compose(G1, G2)
-    return G
+    E2 = generate_erdos_renyi(nodes, p=avg_degree/(2*nodes), seed=seed+1)
+    # Combine: order each pair (undirected) and drop edges present in both
+    E = np.vstack([E1, E2])
+    E.sort(axis=1)
+    return np.unique(E, axis=0)
 
-def write_edgelist(G, output_path, directed=False):
-    """Write graph as edgelist file"""
+def generate_rmat_gpu(nodes, avg_degree=10, seed=42):
+    """Generate an R-MAT power-law graph on the GPU (requires RAPIDS cuGraph)"""
+    try:
+        import cugraph
+    except ImportError:
+        raise SystemExit("--device gpu requires RAPIDS cuGraph (https://rapids.ai); install it or use --device cpu")
+    # R-MAT draws ids in [0, 2^scale); fold the overshoot back onto the requested node count
+    scale = max(1, int(np.ceil(np.log2(nodes))))
+    df = cugraph.generators.rmat(scale=scale, num_edges=nodes * avg_degree // 2, a=0.57, b=0.19, c=0.19,
+                                 seed=seed, clip_and_flip=False, scramble_vertex_ids=True, create_using=None)
+    E = df[['src', 'dst']].to_pandas().to_numpy(dtype=np.int64) % nodes
+    E = E[E[:, 0] != E[:, 1]]
+    E.sort(axis=1)
+    return np.unique(E, axis=0)
+
+def write_edgelist(E, output_path, directed=False):
+    """Write an (M, 2) edge array as edgelist file"""
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for u, v in G.edges():
-            if directed:
-                f.write(f"{u} {v}\n")
-            else:
+    with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+        for lo in range(0, len(E), CHUNK_ROWS):
+            chunk = E[lo:lo + CHUNK_ROWS]
+            if not directed:
                 # For undirected, write both directions to simulate bidirectional influence
-                f.write(f"{u} {v}\n")
-                f.write(f"{v} {u}\n")
-    return G.number_of_edges() * (2 if not directed else 1)
+                chunk = np.column_stack((chunk, chunk[:, ::-1])).reshape(-1, 2)
+            f.write(("%d %d\n" * len(chunk)) % tuple(chunk.ravel().tolist()))
+    return len(E) if directed else 2 * len(E)
 
 def generate_states(nodes, output_path, seed=42):
     """Generate random initial emotional states"""
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     # Generate states in range [-1, 1] with some bias toward neutral
-    states = np.random.normal(0.0, 0.5, nodes)
-    states = np.clip(states, -1.0, 1.0)
+    states = rng.normal(0.0, 0.5, nodes)
+    np.clip(states, -1.0, 1.0, out=states)
     
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for s in states:
-            f.write(f"{s:.6f}\n")
+    with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+        for lo in range(0, nodes, CHUNK_ROWS):
+            chunk = states[lo:lo + CHUNK_ROWS]
+            f.write(("%.6f\n" * len(chunk)) % tuple(chunk.tolist()))
     return states
 
 def main():
@@ -85,20 +113,25 @@ def main():
     parser.add_argument("--states-out", default="data/large_states.txt", help="Output states path")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
     parser.add_argument("--avg-degree", type=int, default=10, help="Average node degree (for some models)")
+    parser.add_argument("--device", choices=['cpu', 'gpu'], default='cpu',
+                       help="gpu: generate an R-MAT graph with RAPIDS cuGraph instead of --model")
     args = parser.parse_args()
     
-    print(f"Generating {args.nodes}-node graph using {args.model} model...")
+    model = 'rmat' if args.device == 'gpu' else args.model
+    print(f"Generating {args.nodes}-node graph using {model} model...")
     
-    if args.model == 'barabasi':
-        G = generate_barabasi_albert(args.nodes, args.avg_degree, args.seed)
+    if args.device == 'gpu':
+        E = generate_rmat_gpu(args.nodes, args.avg_degree, args.seed)
+    elif args.model == 'barabasi':
+        E = generate_barabasi_albert(args.nodes, args.avg_degree, args.seed)
     elif args.model == 'erdos':
-        G = generate_erdos_renyi(args.nodes, seed=args.seed)
+        E = generate_erdos_renyi(args.nodes, seed=args.seed)
     elif args.model == 'watts':
-        G = generate_watts_strogatz(args.nodes, k=args.avg_degree, seed=args.seed)
+        E = generate_watts_strogatz(args.nodes, k=args.avg_degree, seed=args.seed)
     else:  # social
-        G = generate_social_like(args.nodes, args.avg_degree, args.seed)
+        E = generate_social_like(args.nodes, args.avg_degree, args.seed)
     
-    num_edges = write_edgelist(G, args.out, directed=False)
+    num_edges = write_edgelist(E, args.out, directed=False)
     print(f"Generated graph: {args.nodes} nodes, {num_edges} edges")
     print(f"Average degree: {2*num_edges/args.nodes:.2f}")
     print(f"Wrote edgelist to: {args.out}")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+graph_to_bin.py
+
+One-time conversion of an existing data/graph.txt (and optionally data/states.txt)
+into the binary files build_graph.py writes with --csr / --binary, so large graphs
+are loaded with a single read instead of being re-parsed as text on every run.
+
+Outputs (next to the inputs unless --out-dir is given):
+  - graph.csr   (little-endian int64 N, M, int64 row_ptr[N+1], int32 col[M]:
+                 incoming neighbors grouped by destination node)
+  - states.bin  (N little-endian float32 values), with --states
+
+Usage:
+    python py/graph_to_bin.py --graph data/graph.txt --states data/states.txt
+"""
+import argparse
+import os
+import numpy as np
+from csr_io import write_csr
+
+def convert_graph(graph_path, out_path):
+    with open(graph_path, 'r') as f:
+        N, M = map(int, f.readline().split())
+        edges = np.loadtxt(f, dtype=np.int32, ndmin=2) if M > 0 else np.empty((0, 2), dtype=np.int32)
+    if len(edges) != M:
+        raise SystemExit(f"{graph_path}: header says M={M} but found {len(edges)} edges")
+    write_csr(out_path, N, edges)
+    return N, M
+
+def convert_states(states_path, out_path):
+    states = np.loadtxt(states_path, dtype=np.float64, ndmin=1)
+    states.astype('<f4').tofile(out_path)
+    return len(states)
+
+def main():
+    p = argparse.ArgumentParser(description="Convert graph.txt/states.txt to graph.csr/states.bin")
+    p.add_argument("--graph", default="data/graph.txt", help="text graph written by build_graph.py")
+    p.add_argument("--states", help="text states file to convert as well")
+    p.add_argument("--out-dir", help="output directory (default: next to each input)")
+    opt = p.parse_args()
+
+    graph_out = os.path.join(opt.out_dir or os.path.dirname(opt.graph), "graph.csr")
+    os.makedirs(os.path.dirname(graph_out) or ".", exist_ok=True)
+    N, M = convert_graph(opt.graph, graph_out)
+    print(f"Wrote {graph_out} ({N} nodes, {M} edges)")
+
+    if opt.states:
+        states_out = os.path.join(opt.out_dir or os.path.dirname(opt.states), "states.bin")
+        n = convert_states(opt.states, states_out)
+        if n != N:
+            print(f"Warning: {opt.states} has {n} values but the graph has {N} nodes")
+        print(f"Wrote {states_out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+parallel_lib.py
+
+ctypes wrapper around cpp/bin/libparallel_update.so (build with SHARED=1 bash cpp/build.sh).
+Runs the OpenMP update on NumPy CSR arrays in-process: no child process, no text
+round-trip, and the OpenMP thread pool stays warm across calls.
+
+Usage:
+    from parallel_lib import simulate
+    final, history = simulate(indptr, indices, states, steps=100, alpha=0.3, threads=4)
+"""
+import ctypes
+import os
+import numpy as np
+
+DEFAULT_LIB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cpp", "bin", "libparallel_update.so")
+
+_LIBS = {}
+
+def load(path=DEFAULT_LIB):
+    """Load (once) the shared library and declare pu_simulate's signature"""
+    path = os.path.abspath(path)
+    if path not in _LIBS:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; build it with: SHARED=1 bash cpp/build.sh")
+        lib = ctypes.CDLL(path)
+        lib.pu_simulate.restype = ctypes.c_int
+        lib.pu_simulate.argtypes = [
+            np.ctypeslib.ndpointer(np.int64, flags='C_CONTIGUOUS'),
+            np.ctypeslib.ndpointer(np.int32, flags='C_CONTIGUOUS'),
+            ctypes.c_int64,
+            np.ctypeslib.ndpointer(np.float64, flags='C_CONTIGUOUS,WRITEABLE'),
+            np.ctypeslib.ndpointer(np.float64, flags='C_CONTIGUOUS,WRITEABLE'),
+            ctypes.c_int, ctypes.c_double, ctypes.c_int,
+        ]
+        _LIBS[path] = lib
+    return _LIBS[path]
+
+def simulate(indptr, indices, states, steps, alpha, threads=0, lib_path=DEFAULT_LIB):
+    """Incoming-neighbor CSR (as from serial_sim.read_graph) -> (final states, per-step mean history)"""
+    lib = load(lib_path)
+    indptr = np.ascontiguousarray(indptr, dtype=np.int64)
+    indices = np.asarray(indices)  # range-checked below before the int32 cast
+    final = np.array(states, dtype=np.float64).ravel()  # updated in place by the library
+    N = len(final)
+    # the C side trusts these bounds; a bad CSR would read out of bounds or crash the interpreter
+    if indptr.shape != (N + 1,):
+        raise ValueError(f"indptr must have shape ({N + 1},) for {N} states, got {indptr.shape}")
+    if indptr[0] != 0 or indptr[-1] != len(indices):
+        raise ValueError(f"indptr must run from 0 to len(indices)={len(indices)}, got {indptr[0]}..{indptr[-1]}")
+    if np.any(np.diff(indptr) < 0):
+        raise ValueError("indptr must be non-decreasing")
+    if len(indices) and (indices.min() < 0 or indices.max() >= N):
+        raise ValueError(f"indices must lie in [0, {N}), got {indices.min()}..{indices.max()}")
+    indices = np.ascontiguousarray(indices, dtype=np.int32)
+    if steps < 0:
+        raise ValueError(f"steps must be non-negative, got {steps}")
+    history = np.empty(steps, dtype=np.float64)
+    if lib.pu_simulate(indptr, indices, N, final, history, steps, alpha, threads) != 0:
+        raise ValueError("pu_simulate rejected its arguments")
+    return final, history
@@ -6,32 +6,65 @@ Supports:
   --history <history.txt>        (one numeric value per line)
   --execution-time <csv>         (threads,time) - plots execution time vs threads
   --speedup <csv>                (threads,time) - plots speedup vs threads
+  --batch <spec.json>            list of {"history"|"execution_time"|"speedup": path, "out": png},
+                                 rendered in parallel worker processes
 Writes plot to --out (PNG).
 
 Usage:
   python py/plot.py --history results/serial_history.txt --out results/plots/serial_plot.png
   python py/plot.py --execution-time results/execution_time.csv --out results/plots/execution_time.png
   python py/plot.py --speedup results/execution_time.csv --out results/plots/speedup.png
+  python py/plot.py --batch results/plots/plots.json
 """
 import argparse
+import csv
+import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # headless: skip GUI backend probing
 import matplotlib.pyplot as plt
 
+# PNG encoding dominates savefig; a lower zlib level is much faster for near-identical size
+PNG_KWARGS = {'compress_level': 3, 'optimize': False}
+
+_HISTORY_FIG = None
+
+def _history_figure():
+    """Return the cached dual-panel history figure, cleared for redrawing"""
+    global _HISTORY_FIG
+    if _HISTORY_FIG is None:
+        _HISTORY_FIG, _ = plt.subplots(2, 1, figsize=(8, 6))
+    for ax in _HISTORY_FIG.axes:
+        ax.clear()
+        ax.axis('on')
+    return _HISTORY_FIG
+
+_LINE_FIG = None
+
+def _line_figure():
+    """Return the cached single-axes figure used by the thread plots, cleared"""
+    global _LINE_FIG
+    if _LINE_FIG is None:
+        _LINE_FIG = plt.figure(figsize=(6, 4))
+    _LINE_FIG.clear()
+    return _LINE_FIG, _LINE_FIG.add_subplot()
+
 def plot_history(path, out):
     # history: one number per line
     try:
-        hist = np.loadtxt(path)
+        hist = pd.read_csv(path, header=None, dtype=np.float64, engine='c',
+                           memory_map=True).iloc[:, 0].to_numpy()
     except Exception as e:
         print("Error reading history file:", e, file=sys.stderr)
         raise
-    if hist.ndim == 0:
-        hist = np.array([float(hist)])
     
-    # Create figure with better visualization
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(8, 6))
+    # Reuse one figure across calls (batch mode) instead of rebuilding it each time
+    fig = _history_figure()
+    ax1, ax2 = fig.axes
     
     # Full timeline plot
     ax1.plot(hist, linewidth=1.5, color='#2E86AB', alpha=0.8)
@@ -61,24 +94,34 @@ def plot_history(path, out):
                 ha='center', va='center', transform=ax2.transAxes)
         ax2.axis('off')
     
-    plt.tight_layout()
+    fig.tight_layout()
     os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
-    plt.savefig(out, dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(out, dpi=150, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
     print("Wrote", out)
 
-def read_execution_data(path):
-    """Read execution time CSV and return threads and times arrays"""
+def read_execution_data(path, sep=None):
+    """Read execution time CSV and return threads and times arrays (sep=None sniffs it)"""
     try:
-        for sep in [',',';',None]:
+        if sep is None:
+            # sniff the delimiter once instead of re-parsing the file per candidate separator;
+            # the sample skips what read_csv skips (# comments, blank lines), up to ~4 KB of data
+            sample, size = [], 0
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.split('#', 1)[0]
+                    if not line.strip():
+                        continue
+                    sample.append(line.rstrip('\r\n') + '\n')
+                    size += len(line)
+                    if size >= 4096:
+                        break
             try:
-                df = pd.read_csv(path, sep=sep, engine='python', comment='#', skip_blank_lines=True)
-                if df.shape[1] >= 2:
-                    break
-            except Exception:
-                df = None
-        if df is None or df.shape[1] < 2:
-            df = pd.read_csv(path, delim_whitespace=True, header=None, engine='python')
+                sep = csv.Sniffer().sniff(''.join(sample), delimiters=',;\t ').delimiter
+            except csv.Error:
+                sep = ','  # the documented threads,time layout
+        if sep.isspace():
+            sep = r'\s+'
+        df = pd.read_csv(path, sep=sep, engine='c', comment='#', skip_blank_lines=True)
     except Exception as e:
         print("Failed to read CSV with pandas:", e, file=sys.stderr)
         raise
@@ -87,23 +130,16 @@ def read_execution_data(path):
     if df.shape[1] < 2:
         raise SystemExit("execution-time file must contain at least two columns (threads,time). Found:\n" + str(df.head(10)))
 
-    # find first two numeric columns
-    df_cols = df.columns.tolist()
-    numeric_cols = []
-    for col in df_cols:
-        coerced = pd.to_numeric(df[col], errors='coerce')
-        if coerced.notna().sum() > 0:
-            numeric_cols.append(col)
-        if len(numeric_cols) >= 2:
-            break
-    if len(numeric_cols) < 2:
-        raise SystemExit("Couldn't find two numeric columns in execution-time CSV. Inspect file.")
-
-    threads_col, time_col = numeric_cols[0], numeric_cols[1]
-    df2 = df[[threads_col, time_col]].copy()
-    df2[threads_col] = pd.to_numeric(df2[threads_col], errors='coerce')
-    df2[time_col] = pd.to_numeric(df2[time_col], errors='coerce')
-    df2 = df2.dropna(subset=[threads_col, time_col])
+    # documented layout is threads,time first: coerce just those two columns
+    numeric = df.iloc[:, :2].apply(pd.to_numeric, errors='coerce')
+    if numeric.isna().all().any():
+        # leading non-numeric column(s): fall back to the first two numeric columns anywhere
+        numeric = df.apply(pd.to_numeric, errors='coerce').dropna(axis=1, how='all')
+        if numeric.shape[1] < 2:
+            raise SystemExit("Couldn't find two numeric columns in execution-time CSV. Inspect file.")
+
+    df2 = numeric.iloc[:, :2].dropna()
+    threads_col, time_col = df2.columns
 
     df2 = df2.sort_values(by=threads_col)
     threads = df2[threads_col].to_numpy()
@@ -111,46 +147,44 @@ def read_execution_data(path):
     
     return threads, times, df2
 
-def plot_execution_time(path, out):
+def plot_execution_time(path, out, sep=None):
     """Plot execution time vs threads (separate PNG)"""
-    threads, times, df2 = read_execution_data(path)
+    threads, times, df2 = read_execution_data(path, sep)
     
-    plt.figure(figsize=(6, 4))
-    plt.plot(threads, times, marker='o', linewidth=2, markersize=8, color='#2E86AB')
-    plt.xlabel("Threads", fontsize=11)
-    plt.ylabel("Execution time (s)", fontsize=11)
-    plt.title("Execution Time vs Threads", fontsize=12, fontweight='bold')
-    plt.grid(True, alpha=0.3)
-    plt.xticks(threads)
-    plt.tight_layout()
+    fig, ax = _line_figure()
+    ax.plot(threads, times, marker='o', linewidth=2, markersize=8, color='#2E86AB')
+    ax.set_xlabel("Threads", fontsize=11)
+    ax.set_ylabel("Execution time (s)", fontsize=11)
+    ax.set_title("Execution Time vs Threads", fontsize=12, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.set_xticks(threads)
+    fig.tight_layout()
     
     os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
-    plt.savefig(out, dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(out, dpi=150, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
     print("Wrote", out)
 
-def plot_speedup(path, out):
+def plot_speedup(path, out, sep=None):
     """Plot speedup vs threads (separate PNG)"""
-    threads, times, df2 = read_execution_data(path)
+    threads, times, df2 = read_execution_data(path, sep)
     
     # Calculate speedup (relative to 1 thread)
     baseline_time = times[0] if len(times) > 0 else 1.0
     speedup = baseline_time / times
 
-    plt.figure(figsize=(6, 4))
-    plt.plot(threads, speedup, marker='s', linewidth=2, markersize=8, color='#A23B72')
-    plt.axhline(y=1.0, color='gray', linestyle='--', alpha=0.5, label='Baseline (1 thread)')
-    plt.xlabel("Threads", fontsize=11)
-    plt.ylabel("Speedup (relative to 1 thread)", fontsize=11)
-    plt.title("Speedup vs Threads", fontsize=12, fontweight='bold')
-    plt.grid(True, alpha=0.3)
-    plt.xticks(threads)
-    plt.legend(loc='best')
-    plt.tight_layout()
+    fig, ax = _line_figure()
+    ax.plot(threads, speedup, marker='s', linewidth=2, markersize=8, color='#A23B72')
+    ax.axhline(y=1.0, color='gray', linestyle='--', alpha=0.5, label='Baseline (1 thread)')
+    ax.set_xlabel("Threads", fontsize=11)
+    ax.set_ylabel("Speedup (relative to 1 thread)", fontsize=11)
+    ax.set_title("Speedup vs Threads", fontsize=12, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.set_xticks(threads)
+    ax.legend(loc='best')
+    fig.tight_layout()
     
     os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
-    plt.savefig(out, dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(out, dpi=150, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
     print("Wrote", out)
     
     # Also save a speedup CSV
@@ -164,26 +198,62 @@ def plot_speedup(path, out):
     df2.to_csv(cleaned, index=False)
     print("Wrote cleaned CSV to", cleaned)
 
+PLOTTERS = {
+    'history': plot_history,
+    'execution_time': plot_execution_time,
+    'speedup': plot_speedup,
+}
+
+def _dispatch(job):
+    """Render one batch job: {"<mode>": input_path, "out": png_path[, "sep": delimiter]}"""
+    modes = [m for m in PLOTTERS if m in job]
+    if len(modes) != 1:
+        raise ValueError(f"batch job must name exactly one of {sorted(PLOTTERS)}: {job}")
+    if 'sep' in job:
+        if modes[0] == 'history':
+            raise ValueError(f"'sep' only applies to execution_time and speedup jobs, not history: {job}")
+        PLOTTERS[modes[0]](job[modes[0]], job['out'], job['sep'])
+    else:
+        PLOTTERS[modes[0]](job[modes[0]], job['out'])
+
+def run_batch(spec_path):
+    """Render every job in a JSON spec, one figure per worker process"""
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+    if not jobs:
+        return
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers == 1:
+        for job in jobs:
+            _dispatch(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(_dispatch, jobs))
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--history", help="history file (one numeric per line)")
     parser.add_argument("--speedup", help="speedup CSV file (threads,time). Header allowed.")
     parser.add_argument("--execution-time", help="execution time CSV file (threads,time). Header allowed.")
+    parser.add_argument("--batch", help="JSON list of plot jobs to render in parallel")
+    parser.add_argument("--sep", help="delimiter of the execution-time CSV (skips sniffing)")
     parser.add_argument("--out", default="results/plot.png", help="output image path (PNG)")
     opt = parser.parse_args()
 
-    count = sum([bool(opt.history), bool(opt.speedup), bool(opt.execution_time)])
+    count = sum([bool(opt.history), bool(opt.speedup), bool(opt.execution_time), bool(opt.batch)])
     if count == 0:
-        parser.error("Specify one of --history, --speedup, or --execution-time")
+        parser.error("Specify one of --history, --speedup, --execution-time, or --batch")
     if count > 1:
-        parser.error("Specify only one of --history, --speedup, or --execution-time")
+        parser.error("Specify only one of --history, --speedup, --execution-time, or --batch")
 
     if opt.history:
         plot_history(opt.history, opt.out)
     elif opt.speedup:
-        plot_speedup(opt.speedup, opt.out)
+        plot_speedup(opt.speedup, opt.out, opt.sep)
     elif opt.execution_time:
-        plot_execution_time(opt.execution_time, opt.out)
+        plot_execution_time(opt.execution_time, opt.out, opt.sep)
+    elif opt.batch:
+        run_batch(opt.batch)
 
 if __name__ == "__main__":
     main()
@@ -9,82 +9,90 @@ Usage:
     python py/scale_existing_graph.py --input data/raw/12831.edges --copies 10 --out data/raw/scaled_graph.edges
 """
 import argparse
-import networkx as nx
 import numpy as np
+import pandas as pd
 import os
 
+# large write buffer: edge/state dumps run to hundreds of MB
+WRITE_BUFFER = 1 << 24
+# rows formatted per write: bounds the Python objects and text held at once
+CHUNK_ROWS = 1 << 20
+
 def read_edgelist(path):
-    """Read edgelist file"""
-    G = nx.DiGraph()
-    with open(path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            parts = line.split()
-            if len(parts) >= 2:
-                u, v = parts[0], parts[1]
-                try:
-                    G.add_edge(int(u), int(v))
-                except ValueError:
-                    G.add_edge(u, v)
-    return G
+    """Read edgelist file as an (M, 2) array (int64 ids, or str handles)"""
+    # C-level tokenizer instead of a Python split() per line
+    df = pd.read_csv(path, sep=r'\s+', header=None, names=['u', 'v'], usecols=[0, 1],
+                     dtype=str, comment='#', engine='c').dropna()
+    arr = df.to_numpy()
+    try:
+        arr = arr.astype(np.int64)
+    except ValueError:
+        pass  # keep text handles as strings
+    return arr
 
-def scale_graph(G, copies, inter_connect_prob=0.01, seed=42):
+def scale_graph(edges, copies, inter_connect_prob=0.01, seed=42):
     """
     Create multiple copies of the graph and connect them
     
     Args:
-        G: Input graph
+        edges: (M, 2) edge array from read_edgelist
         copies: Number of copies to make
         inter_connect_prob: Probability of connecting nodes across copies
         seed: Random seed
+
+    Returns:
+        (scaled (E, 2) edge array, number of nodes)
     """
-    np.random.seed(seed)
-    original_nodes = list(G.nodes())
-    original_edges = list(G.edges())
-    max_orig_id = max(int(n) for n in original_nodes if str(n).isdigit()) if original_nodes else 0
-    
-    scaled_G = nx.DiGraph()
-    node_mapping = {}  # (copy_id, orig_node) -> new_node_id
-    
-    # Create copies
-    for copy_id in range(copies):
-        offset = copy_id * (max_orig_id + 1)
-        for orig_node in original_nodes:
-            if isinstance(orig_node, (int, np.integer)):
-                new_node = orig_node + offset
-            else:
-                new_node = f"{orig_node}_copy{copy_id}"
-            node_mapping[(copy_id, orig_node)] = new_node
-            scaled_G.add_node(new_node)
-        
-        # Add edges within this copy
-        for u, v in original_edges:
-            new_u = node_mapping[(copy_id, u)]
-            new_v = node_mapping[(copy_id, v)]
-            scaled_G.add_edge(new_u, new_v)
-    
+    # dense codes in first-seen order; repeated edges collapse as in a DiGraph
+    codes, nodes = pd.factorize(edges.ravel())
+    n = len(nodes)
+    u, v = codes[0::2].astype(np.int64), codes[1::2].astype(np.int64)
+    _, first = np.unique(u * n + v, return_index=True)
+    first.sort()
+    u, v = u[first], v[first]
+    # group by source in node order, as DiGraph.edges() listed them (keeps build_graph's numbering)
+    order = np.argsort(u, kind='stable')
+    E = np.column_stack((u[order], v[order]))
+
+    # every copy is the same edge set shifted by copy_id * n
+    offsets = np.arange(copies, dtype=np.int64) * n
+    scaled = (E[None, :, :] + offsets[:, None, None]).reshape(-1, 2)
+    n_total = n * copies
+
     # Add inter-copy connections (simulate cross-community influence)
     if copies > 1 and inter_connect_prob > 0:
-        all_nodes = list(scaled_G.nodes())
-        num_inter_edges = int(len(all_nodes) * inter_connect_prob * copies)
-        
-        for _ in range(num_inter_edges):
-            u = np.random.choice(all_nodes)
-            v = np.random.choice(all_nodes)
-            if u != v and not scaled_G.has_edge(u, v):
-                scaled_G.add_edge(u, v)
-    
-    return scaled_G
+        num_inter_edges = int(n_total * inter_connect_prob * copies)
+        rng = np.random.default_rng(seed)
+        # oversample so dropping self-loops still leaves num_inter_edges candidates
+        inter = rng.integers(0, n_total, size=(int(num_inter_edges * 1.2) + 1, 2), dtype=np.int64)
+        inter = inter[inter[:, 0] != inter[:, 1]][:num_inter_edges]
+        # packed u*n_total+v ids: drop repeats (first-seen order) and samples hitting copy edges;
+        # copy edges are already unique, so only the samples need checking
+        packed = inter[:, 0] * n_total + inter[:, 1]
+        _, first = np.unique(packed, return_index=True)
+        first.sort()
+        keep = first[~np.isin(packed[first], scaled[:, 0] * n_total + scaled[:, 1])]
+        scaled = np.concatenate((scaled, inter[keep]))
+        # codes follow node insertion order, so this files each new edge under its source
+        scaled = scaled[np.argsort(scaled[:, 0], kind='stable')]
+
+    # map codes back to node ids
+    if nodes.dtype.kind in 'iu':
+        max_orig_id = max(int(nodes.max()), 0) if n else 0
+        labels = (nodes[None, :] + np.arange(copies)[:, None] * (max_orig_id + 1)).ravel()
+    else:
+        labels = np.array([f"{node}_copy{c}" for c in range(copies) for node in nodes], dtype=object)
+    return labels[scaled], n_total
 
-def write_edgelist(G, output_path):
-    """Write graph as edgelist"""
+def write_edgelist(edges, output_path):
+    """Write edge array as edgelist"""
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for u, v in G.edges():
-            f.write(f"{u} {v}\n")
-    return G.number_of_edges()
+    with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+        # one formatted buffer per CHUNK_ROWS edges instead of a write() per edge
+        for lo in range(0, len(edges), CHUNK_ROWS):
+            chunk = edges[lo:lo + CHUNK_ROWS]
+            f.write(("%s %s\n" * len(chunk)) % tuple(chunk.ravel().tolist()))
+    return len(edges)
 
 def main():
     parser = argparse.ArgumentParser(description="Scale up an existing graph")
@@ -97,14 +105,14 @@ def main():
     args = parser.parse_args()
     
     print(f"Reading graph from: {args.input}")
-    G = read_edgelist(args.input)
-    print(f"Original graph: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+    edges = read_edgelist(args.input)
+    print(f"Original graph: {len(pd.unique(edges.ravel()))} nodes, {len(pd.DataFrame(edges).drop_duplicates())} edges")
     
     print(f"Scaling by {args.copies}x...")
-    scaled_G = scale_graph(G, args.copies, args.inter_connect, args.seed)
+    scaled, num_nodes = scale_graph(edges, args.copies, args.inter_connect, args.seed)
     
-    num_edges = write_edgelist(scaled_G, args.out)
-    print(f"Scaled graph: {scaled_G.number_of_nodes()} nodes, {num_edges} edges")
+    num_edges = write_edgelist(scaled, args.out)
+    print(f"Scaled graph: {num_nodes} nodes, {num_edges} edges")
     print(f"Wrote to: {args.out}")
     
     print("\nTo use this graph:")
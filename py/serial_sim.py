@@ -1,25 +1,112 @@
 #!/usr/bin/env python3
-import argparse, numpy as np, os, sys, time
+import argparse, glob, hashlib, numpy as np, os, sys, time, zipfile
+from csr_io import csr_from_edges
+try:
+    from numba import njit, prange
+except ImportError:  # optional; simulate falls back to the NumPy bincount step
+    njit = None
 
-def read_graph(graph_path):
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _step(indptr, indices, s, new, alpha):
+        # one CSR row per node; no fastmath here and -ffp-contract=off in cpp/build.sh, so each
+        # row sums and updates in the same order, with the same roundings, as the C++ code.
+        # Returns sum(new), fused into the update like the C++ global_sum reduction.
+        total=0.0
+        for v in prange(s.shape[0]):
+            start=indptr[v]; end=indptr[v+1]
+            if start==end:
+                new[v]=s[v]
+            else:
+                acc=0.0
+                for k in range(start,end): acc+=s[indices[k]]
+                new[v]=(1-alpha)*s[v] + alpha*(acc/(end-start))
+            total+=new[v]
+        return total
+else:
+    _step = None
+
+def _graph_cache_path(graph_path):
+    """.cache/graph-<path sha1>-<version sha1>.npz next to the graph
+
+    The first hash keys on the absolute path, the second on mtime and size, so older
+    caches of the same graph share a prefix and can be pruned."""
+    st=os.stat(graph_path)
+    path_key=hashlib.sha1(os.path.abspath(graph_path).encode()).hexdigest()[:16]
+    version=hashlib.sha1(f"{st.st_mtime_ns}|{st.st_size}".encode()).hexdigest()[:16]
+    return os.path.join(os.path.dirname(graph_path) or ".", ".cache", f"graph-{path_key}-{version}.npz")
+
+def _load_graph_cache(cache_path):
+    """(N, indptr, indices) from a cache file, or None if it is missing or unreadable"""
+    try:
+        with np.load(cache_path) as data:
+            return int(data['N']), data['indptr'], data['indices']
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return None  # missing, or truncated by an interrupted write: parse again
+
+def _write_graph_cache(cache_path, N, indptr, indices):
+    """Write the cache atomically (temp file + os.replace), then drop older caches of the same graph"""
+    tmp=f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp,'wb') as f:
+            np.savez(f, N=N, indptr=indptr, indices=indices)
+        os.replace(tmp, cache_path)
+    except OSError:
+        # read-only data dir: just parse again next time
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+    prefix=cache_path.rsplit('-', 1)[0]
+    for stale in glob.glob(glob.escape(prefix) + "-*.npz"):
+        if stale != cache_path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+def read_graph(graph_path, cache=True):
+    """Return (N, indptr, indices): incoming-neighbor CSR, indices[indptr[v]:indptr[v+1]] are v's sources
+
+    Text graphs are cached as .npz after the first parse (cache=False skips this)."""
+    if graph_path.endswith('.csr'):
+        # binary CSR from build_graph.py --csr: N, M, row_ptr[N+1], col[M]
+        with open(graph_path,'rb') as f:
+            N,M = np.fromfile(f, dtype='<i8', count=2)
+            indptr = np.fromfile(f, dtype='<i8', count=N+1)
+            indices = np.fromfile(f, dtype='<i4', count=M)
+        return int(N), indptr, indices
+    cache_path = _graph_cache_path(graph_path) if cache else None
+    if cache_path:
+        cached = _load_graph_cache(cache_path)
+        if cached is not None:
+            return cached
     with open(graph_path,'r') as f:
         N,M = map(int, f.readline().split())
-        preds=[[] for _ in range(N)]
-        for line in f:
-            u,v = line.strip().split()
-            u,v=int(u),int(v)
-            preds[v].append(u)
-    return N, preds
+        # C-level parse of the "u v" lines straight into an (M, 2) int32 array
+        edges = np.loadtxt(f, dtype=np.int32, ndmin=2) if M > 0 else np.empty((0, 2), dtype=np.int32)
+    indptr, indices = csr_from_edges(N, edges)
+    if cache_path:
+        _write_graph_cache(cache_path, N, indptr, indices)
+    return N, indptr, indices
 
 def read_states(states_path):
-    s=[]
-    with open(states_path,'r') as f:
-        for line in f: s.append(float(line.strip()))
-    return np.array(s, dtype=float)
+    if states_path.endswith('.bin'):
+        # raw little-endian float32 written by build_graph.py --binary
+        return np.fromfile(states_path, dtype='<f4').astype(float)
+    return np.loadtxt(states_path, dtype=np.float64, ndmin=1)
 
-def simulate(N,preds,states,steps,alpha,verbose=True):
+def simulate(N,indptr,indices,states,steps,alpha,verbose=True):
     history=[]
     s=states.copy()
+    new=np.empty_like(s)
+    # per-edge destination row, so one bincount sums every node's predecessors (an SpMV)
+    deg=np.diff(indptr)
+    rows=np.repeat(np.arange(N), deg)
+    isolated=deg==0
+    denom=np.where(isolated, 1, deg).astype(float)
     start_time = time.time()
     print_interval = max(1, steps // 20)  # Print ~20 progress updates
     
@@ -28,17 +115,20 @@ def simulate(N,preds,states,steps,alpha,verbose=True):
         sys.stderr.write(f"[Serial] Starting {steps} steps on {N} nodes...\n")
         sys.stderr.flush()
     
+    avg=np.empty(N)
     for t in range(steps):
-        new=s.copy()
-        for v in range(N):
-            neigh = preds[v]
-            if len(neigh)==0:
-                new[v]=s[v]
-            else:
-                avg = sum(s[u] for u in neigh)/len(neigh)
-                new[v] = (1-alpha)*s[v] + alpha*avg
-        s=new
-        history.append(float(s.mean()))
+        if _step is not None:
+            total = _step(indptr, indices, s, new, alpha)
+        else:
+            # same arithmetic as (1-alpha)*s + alpha*avg, written into the spare buffer
+            np.divide(np.bincount(rows, weights=s[indices], minlength=N), denom, out=avg)
+            np.multiply(avg, alpha, out=avg)
+            np.multiply(s, 1-alpha, out=new)
+            np.add(new, avg, out=new, casting='same_kind')
+            np.copyto(new, s, where=isolated)
+            total = new.sum(dtype=np.float64)
+        s, new = new, s
+        history.append(float(total)/N if N else float('nan'))
         
         # Progress logging - print first step immediately, then at intervals
         if verbose and (t == 0 or t % print_interval == 0 or t == steps - 1):
@@ -61,35 +151,103 @@ def simulate(N,preds,states,steps,alpha,verbose=True):
     
     return s, history
 
+def run_arrays(edges, states, steps, alpha, N=None, verbose=False):
+    """In-memory run on an (M, 2) edge array and a states array, no file round-trip; returns (final, history)"""
+    states=np.asarray(states, dtype=np.float64)
+    N=len(states) if N is None else N
+    indptr, indices = csr_from_edges(N, edges)
+    return simulate(N, indptr, indices, states, steps, alpha, verbose=verbose)
+
+def check_invariants(s0, final, history, steps, alpha):
+    """Implementation-independent sanity checks on any simulator's output (history may be None)
+
+    For 0<=alpha<=1 each update is a convex combination of current states, so final
+    states and every per-step mean stay within [min(s0), max(s0)] (up to rounding).
+    Returns a list of violation messages, or None when the checks do not apply."""
+    if len(s0)==0 or not 0<=alpha<=1:
+        return None
+    if len(final)!=len(s0):
+        return [f"final states have {len(final)} values but the initial states have {len(s0)}"]
+    lo, hi = float(s0.min()), float(s0.max())
+    tol = 4*np.finfo(final.dtype).eps*max(1,steps)*max(1.0, abs(lo), abs(hi))
+    problems=[]
+    if not np.isfinite(final).all():
+        problems.append("final states contain NaN/inf")
+    elif final.min() < lo-tol or final.max() > hi+tol:
+        problems.append(f"final states [{final.min()}, {final.max()}] leave the initial range [{lo}, {hi}]")
+    h=np.asarray(history if history is not None else [], dtype=np.float64)
+    if len(h) and not np.isfinite(h).all():
+        problems.append("history contains NaN/inf")
+    elif len(h) and (h.min() < lo-tol or h.max() > hi+tol):
+        problems.append(f"history means [{h.min()}, {h.max()}] leave the initial range [{lo}, {hi}]")
+    return problems
+
+def write_values(path, values):
+    """Write one value per line as a single buffer (*.npy: float64 array for np.load(mmap_mode='r'))"""
+    if path.endswith('.npy'):
+        np.save(path, np.asarray(values, dtype=np.float64))
+        return
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.floating):
+        # Python floats, not per-element NumPy scalars; float32 values widen exactly to float64
+        values = values.tolist()
+    with open(path,'w') as f:
+        f.write("".join(f"{v}\n" for v in values))
+
+def run(graph="data/graph.txt", states="data/states.txt", steps=100, alpha=0.3,
+        out="results/serial_history.txt", quiet=False, no_cache=False, dtype='f64',
+        final_out="results/serial_final_states.txt", check=False):
+    """Load, simulate and write results in-process (what the CLI does); returns (final, history)
+
+    Raises ValueError if the states do not match the graph and RuntimeError if --check fails."""
+    for path in (out, final_out):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    
+    print(f"[Serial] Loading graph from {graph}...", file=sys.stderr)
+    N,indptr,indices = read_graph(graph, cache=not no_cache)
+    print(f"[Serial] Graph loaded: {N} nodes, {len(indices)} edges", file=sys.stderr)
+    
+    print(f"[Serial] Loading states from {states}...", file=sys.stderr)
+    s0 = read_states(states).astype(np.float32 if dtype=='f32' else np.float64, copy=False)
+    if len(s0)!=N:
+        raise ValueError(f"states length {len(s0)} does not match N={N}")
+    
+    print(f"[Serial] Starting simulation: {steps} steps, alpha={alpha}...", file=sys.stderr)
+    final, history = simulate(N,indptr,indices,s0,steps,alpha,verbose=not quiet)
+    if check:
+        problems = check_invariants(s0, final, history, steps, alpha)
+        if problems is None:
+            print("[Serial] Invariant checks skipped (they need 0 <= alpha <= 1 and N > 0)", file=sys.stderr)
+        elif problems:
+            raise RuntimeError("invariant check failed: " + "; ".join(problems))
+        else:
+            print("[Serial] Invariant checks passed", file=sys.stderr)
+    
+    print(f"[Serial] Writing results...", file=sys.stderr)
+    write_values(out, history)
+    write_values(final_out, final)
+    print(f"[Serial] Wrote history to {out} and {final_out}", file=sys.stderr)
+    return final, history
+
 def main():
     p=argparse.ArgumentParser()
     p.add_argument("--graph", default="data/graph.txt")
     p.add_argument("--states", default="data/states.txt")
     p.add_argument("--steps", type=int, default=100)
     p.add_argument("--alpha", type=float, default=0.3)
-    p.add_argument("--out", default="results/serial_history.txt")
+    p.add_argument("--out", default="results/serial_history.txt", help="History output (.npy: float64 array)")
+    p.add_argument("--final-out", default="results/serial_final_states.txt",
+                   help="Final states output (.npy: float64 array)")
     p.add_argument("--quiet", action="store_true", help="Suppress progress output")
+    p.add_argument("--no-cache", action="store_true", help="Always re-parse a text graph instead of using its .npz cache")
+    p.add_argument("--dtype", choices=['f32','f64'], default='f64',
+                   help="State precision; f32 halves memory traffic (f64 matches the C++ binary from cpp/build.sh exactly)")
+    p.add_argument("--check", action="store_true",
+                   help="Verify final states and history stay within the initial state range")
     args=p.parse_args()
-    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
-    
-    print(f"[Serial] Loading graph from {args.graph}...", file=sys.stderr)
-    N,preds = read_graph(args.graph)
-    print(f"[Serial] Graph loaded: {N} nodes, {sum(len(p) for p in preds)} edges", file=sys.stderr)
-    
-    print(f"[Serial] Loading states from {args.states}...", file=sys.stderr)
-    states = read_states(args.states)
-    if len(states)!=N:
-        raise SystemExit("states length does not match N")
-    
-    print(f"[Serial] Starting simulation: {args.steps} steps, alpha={args.alpha}...", file=sys.stderr)
-    final, history = simulate(N,preds,states,args.steps,args.alpha,verbose=not args.quiet)
-    
-    print(f"[Serial] Writing results...", file=sys.stderr)
-    with open(args.out,'w') as f:
-        for v in history: f.write(f"{v}\n")
-    with open("results/serial_final_states.txt",'w') as f:
-        for v in final: f.write(f"{v}\n")
-    print(f"[Serial] Wrote history to {args.out} and results/serial_final_states.txt", file=sys.stderr)
+    try:
+        run(**vars(args))
+    except (ValueError, RuntimeError) as e:
+        raise SystemExit(f"[Serial] {e}")
 
 if __name__=="__main__":
     main()
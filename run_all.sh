@@ -227,15 +227,19 @@ fi
 # Step 6: plots
 mkdir -p "${OUTDIR}/plots"
 echo "Generating plots..."
+# Collect all plot jobs into one spec so plot.py renders them in parallel
+PLOT_SPEC="${OUTDIR}/plots/plots.json"
+PLOT_JOBS="{\"execution_time\": \"${OUTDIR}/execution_time.csv\", \"out\": \"${OUTDIR}/plots/execution_time.png\", \"sep\": \",\"}"
+PLOT_JOBS="${PLOT_JOBS}, {\"speedup\": \"${OUTDIR}/execution_time.csv\", \"out\": \"${OUTDIR}/plots/speedup.png\", \"sep\": \",\"}"
 # Skip serial history plot if serial was skipped
 if [ -f "${OUTDIR}/serial/serial_history.txt" ]; then
-  "${PYTHON}" py/plot.py --history "${OUTDIR}/serial/serial_history.txt" --out "${OUTDIR}/plots/serial_history.png"
+  PLOT_JOBS="${PLOT_JOBS}, {\"history\": \"${OUTDIR}/serial/serial_history.txt\", \"out\": \"${OUTDIR}/plots/serial_history.png\"}"
 else
   echo "Skipping serial history plot (serial simulation was skipped)"
 fi
-# Generate separate plots for execution time and speedup
-"${PYTHON}" py/plot.py --execution-time "${OUTDIR}/execution_time.csv" --out "${OUTDIR}/plots/execution_time.png"
-"${PYTHON}" py/plot.py --speedup "${OUTDIR}/execution_time.csv" --out "${OUTDIR}/plots/speedup.png"
+echo "[${PLOT_JOBS}]" > "${PLOT_SPEC}"
+# Generate separate plots for execution time and speedup (and serial history if present)
+"${PYTHON}" py/plot.py --batch "${PLOT_SPEC}"
 cp -v "${OUTDIR}/parallel/history_"*.txt "${OUTDIR}/plots/" 2>/dev/null || true
 
 # Step 7: metadata — create JSON safely (uses $PYTHON and serializes THREADS_LIST)